@@ -602,11 +602,33 @@ class DistributedArray(DistributedMixIn):
     def __rmul__(self, x):
         return self.multiply(x)
 
-    def add(self, dist_array):
+    def add(self, dist_array, out=None):
         """Distributed Addition of arrays
+
+        Parameters
+        ----------
+        dist_array : :obj:`pylops_mpi.DistributedArray`
+            DistributedArray to add.
+        out : :obj:`pylops_mpi.DistributedArray`, optional
+            DistributedArray where the result is stored (it can be one
+            of the operands). If ``None``, a new DistributedArray is created.
+
+        Returns
+        -------
+        SumArray : :obj:`pylops_mpi.DistributedArray`
+            Sum of the two arrays.
         """
         self._check_partition_shape(dist_array)
         self._check_mask(dist_array)
+        if out is not None:
+            self._check_partition_shape(out)
+            self._check_mask(out)
+            if out.partition is Partition.BROADCAST:
+                out[:] = self.local_array + dist_array.local_array
+            else:
+                ncp = get_module(self.engine)
+                ncp.add(self.local_array, dist_array.local_array, out=out.local_array)
+            return out
         SumArray = DistributedArray(global_shape=self.global_shape,
                                     base_comm=self.base_comm,
                                     base_comm_nccl=self.base_comm_nccl,
@@ -627,13 +649,38 @@ class DistributedArray(DistributedMixIn):
         self[:] = self.local_array + dist_array.local_array
         return self
 
-    def multiply(self, dist_array):
+    def multiply(self, dist_array, out=None):
         """Distributed Element-wise multiplication
+
+        Parameters
+        ----------
+        dist_array : :obj:`pylops_mpi.DistributedArray` or :obj:`float`
+            DistributedArray or scalar to multiply by.
+        out : :obj:`pylops_mpi.DistributedArray`, optional
+            DistributedArray where the result is stored (it can be one
+            of the operands). If ``None``, a new DistributedArray is created.
+
+        Returns
+        -------
+        ProductArray : :obj:`pylops_mpi.DistributedArray`
+            Element-wise product.
         """
         if isinstance(dist_array, DistributedArray):
             self._check_partition_shape(dist_array)
             self._check_mask(dist_array)
+            other = dist_array.local_array
+        else:
+            other = dist_array
 
+        if out is not None:
+            self._check_partition_shape(out)
+            self._check_mask(out)
+            if out.partition is Partition.BROADCAST:
+                out[:] = self.local_array * other
+            else:
+                ncp = get_module(self.engine)
+                ncp.multiply(self.local_array, other, out=out.local_array)
+            return out
         ProductArray = DistributedArray(global_shape=self.global_shape,
                                         base_comm=self.base_comm,
                                         base_comm_nccl=self.base_comm_nccl,
@@ -643,12 +690,7 @@ class DistributedArray(DistributedMixIn):
                                         mask=self.mask,
                                         engine=self.engine,
                                         axis=self.axis)
-        if isinstance(dist_array, DistributedArray):
-            # multiply two DistributedArray
-            ProductArray[:] = self.local_array * dist_array.local_array
-        else:
-            # multiply with scalar
-            ProductArray[:] = self.local_array * dist_array
+        ProductArray[:] = self.local_array * other
         return ProductArray
 
     def dot(self, dist_array, vdot: bool = False):
@@ -1038,10 +1080,28 @@ class StackedDistributedArray:
     def __rmul__(self, x):
         return self.multiply(x)
 
-    def add(self, stacked_array):
+    def add(self, stacked_array, out=None):
         """Stacked Distributed Addition of arrays
+
+        Parameters
+        ----------
+        stacked_array : :obj:`pylops_mpi.StackedDistributedArray`
+            StackedDistributedArray to add.
+        out : :obj:`pylops_mpi.StackedDistributedArray`, optional
+            StackedDistributedArray where the result is stored (it can be one
+            of the operands). If ``None``, a new StackedDistributedArray is created.
+
+        Returns
+        -------
+        SumArray : :obj:`pylops_mpi.StackedDistributedArray`
+            Sum of the two arrays.
         """
         self._check_stacked_size(stacked_array)
+        if out is not None:
+            self._check_stacked_size(out)
+            for iarr in range(self.narrays):
+                self[iarr].add(stacked_array[iarr], out=out[iarr])
+            return out
         SumArray = self.copy()
         for iarr in range(self.narrays):
             SumArray[iarr][:] = (self[iarr] + stacked_array[iarr])[:]
@@ -1055,11 +1115,31 @@ class StackedDistributedArray:
             self[iarr][:] = (self[iarr] + stacked_array[iarr])[:]
         return self
 
-    def multiply(self, stacked_array):
+    def multiply(self, stacked_array, out=None):
         """Stacked Distributed Multiplication of arrays
+
+        Parameters
+        ----------
+        stacked_array : :obj:`pylops_mpi.StackedDistributedArray` or :obj:`float`
+            StackedDistributedArray or scalar to multiply by.
+        out : :obj:`pylops_mpi.StackedDistributedArray`, optional
+            StackedDistributedArray where the result is stored (it can be one
+            of the operands). If ``None``, a new StackedDistributedArray is created.
+
+        Returns
+        -------
+        ProductArray : :obj:`pylops_mpi.StackedDistributedArray`
+            Element-wise product.
         """
         if isinstance(stacked_array, StackedDistributedArray):
             self._check_stacked_size(stacked_array)
+        if out is not None:
+            self._check_stacked_size(out)
+            for iarr in range(self.narrays):
+                other = stacked_array[iarr] if isinstance(stacked_array, StackedDistributedArray) \
+                    else stacked_array
+                self[iarr].multiply(other, out=out[iarr])
+            return out
         ProductArray = self.copy()
 
         if isinstance(stacked_array, StackedDistributedArray):
@@ -128,11 +128,12 @@ class CG(Solver):
         Opc = self.Op.matvec(self.c)
         cOpc = np.abs(self.c.dot(Opc.conj()))
         a = float((self.kold / cOpc).item())
-        x += a * self.c
-        self.r -= a * Opc
+        # update x, r, and c in-place to avoid allocating new arrays
+        x.add(self.c.multiply(a), out=x)
+        self.r.add(Opc.multiply(-a, out=Opc), out=self.r)
         k = float(np.abs(self.r.dot(self.r.conj())).item())
         b = float(k / self.kold)
-        self.c = self.r + b * self.c
+        self.c = self.r.add(self.c.multiply(b, out=self.c), out=self.c)
         self.kold = k
         self.iiter += 1
         self.cost.append(float(np.sqrt(self.kold)))
@@ -387,13 +388,14 @@ class CGLS(Solver):
         """
 
         a = float(np.abs(self.kold / (self.q.dot(self.q.conj()) + self.damp * self.c.dot(self.c.conj()))).item())
-        x += a * self.c
-        self.s -= a * self.q
+        # update x, s, and c in-place to avoid allocating new arrays
+        x.add(self.c.multiply(a), out=x)
+        self.s.add(self.q.multiply(-a, out=self.q), out=self.s)
         damped_x = self.damp * x
         r = self.Op.rmatvec(self.s) - damped_x
         k = float(np.abs(r.dot(r.conj())).item())
         b = float(k / self.kold)
-        self.c = r + b * self.c
+        self.c = r.add(self.c.multiply(b, out=self.c), out=self.c)
         self.q = self.Op.matvec(self.c)
         self.kold = k
         self.iiter += 1
@@ -279,6 +279,8 @@ def mpi_sendrecv(base_comm: MPI.Comm, sendbuf: NDArray, recvbuf: NDArray, dest:
 def _mpi_calls(comm: MPI.Comm, func: str, *args, engine: Optional[str] = "numpy", **kwargs):
     """MPI Calls
     Wrapper around MPI comm calls with optional GPU synchronization for CuPy arrays.
+    Since MPI is not aware of CUDA streams, the device is synchronized before
+    the call, so that kernels writing to the buffers on any stream have completed.
 
     Parameters
     ----------
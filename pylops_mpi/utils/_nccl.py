@@ -102,10 +102,18 @@ def initialize_nccl_comm() -> nccl.NcclCommunicator:
     i.e. the number of MPI process launched must be equal to
     number of GPUs in communications
 
+    When a single GPU is visible to each process (e.g., processes are bound
+    to GPUs via ``CUDA_VISIBLE_DEVICES``), such GPU is used.
+
     Returns:
     -------
     nccl_comm : :obj:`cupy.cuda.nccl.NcclCommunicator`
         A corresponding NCCL communicator
+
+    Raises
+    ------
+    ValueError
+        If the local rank of the process exceeds the number of visible GPUs
     """
     comm = MPI.COMM_WORLD
     rank = comm.Get_rank()
@@ -115,10 +123,19 @@ def initialize_nccl_comm() -> nccl.NcclCommunicator:
     node_comm = comm.Split_type(MPI.COMM_TYPE_SHARED)
     size_node = node_comm.Get_size()
 
-    device_id = int(
-        os.environ.get("OMPI_COMM_WORLD_LOCAL_RANK")
-        or (rank % size_node) % cp.cuda.runtime.getDeviceCount()
-    )
+    device_count = cp.cuda.runtime.getDeviceCount()
+    if device_count == 1:
+        # The process has been bound to a single GPU (e.g., via
+        # CUDA_VISIBLE_DEVICES), which is therefore used regardless of its rank
+        device_id = 0
+    else:
+        device_id = int(
+            os.environ.get("OMPI_COMM_WORLD_LOCAL_RANK")
+            or (rank % size_node) % device_count
+        )
+        if device_id >= device_count:
+            raise ValueError(f"Local rank {device_id} has no GPU to use, "
+                             f"only {device_count} GPUs are visible")
     cp.cuda.Device(device_id).use()
 
     if rank == 0:
@@ -197,7 +214,7 @@ def nccl_allgather(nccl_comm, send_buf, recv_buf=None) -> cp.ndarray:
         recv_buf.data.ptr,
         _nccl_buf_size(send_buf),
         cupy_to_nccl_dtype[str(send_buf.dtype)],
-        cp.cuda.Stream.null.ptr,
+        cp.cuda.get_current_stream().ptr,
     )
     return recv_buf
 
@@ -236,7 +253,7 @@ def nccl_allreduce(nccl_comm, send_buf, recv_buf=None, op: MPI.Op = MPI.SUM) ->
         _nccl_buf_size(send_buf),
         cupy_to_nccl_dtype[str(send_buf.dtype)],
         mpi_op_to_nccl(op),
-        cp.cuda.Stream.null.ptr,
+        cp.cuda.get_current_stream().ptr,
     )
     return recv_buf
 
@@ -258,7 +275,7 @@ def nccl_bcast(nccl_comm, send_buf, root: int = 0) -> None:
         _nccl_buf_size(send_buf),
         cupy_to_nccl_dtype[str(send_buf.dtype)],
         root,
-        cp.cuda.Stream.null.ptr,
+        cp.cuda.get_current_stream().ptr,
     )
 
 
@@ -266,6 +283,9 @@ def nccl_asarray(nccl_comm, local_array, local_shapes, axis) -> cp.ndarray:
     """Global view of the array
 
     Gather all local GPU arrays into a single global array via NCCL all-gather.
+    As any other NCCL call, the all-gather is enqueued on the current CuPy
+    stream; this allows the communication to be overlapped with computations
+    running on a different stream.
 
     Parameters
     ----------
@@ -311,7 +331,7 @@ def nccl_send(nccl_comm, send_buf, dest, count):
                    _nccl_buf_size(send_buf, count),
                    cupy_to_nccl_dtype[str(send_buf.dtype)],
                    dest,
-                   cp.cuda.Stream.null.ptr
+                   cp.cuda.get_current_stream().ptr
                    )
 
 
@@ -334,7 +354,7 @@ def nccl_recv(nccl_comm, recv_buf, source, count=None):
                    _nccl_buf_size(recv_buf, count),
                    cupy_to_nccl_dtype[str(recv_buf.dtype)],
                    source,
-                   cp.cuda.Stream.null.ptr
+                   cp.cuda.get_current_stream().ptr
                    )
 
 
@@ -19,6 +19,7 @@ import pytest
 
 from pylops_mpi import DistributedArray, Partition
 from pylops_mpi.DistributedArray import local_split
+from pylops_mpi.utils import deps
 
 np.random.seed(42)
 rank = MPI.COMM_WORLD.Get_rank()
@@ -162,6 +163,28 @@ def test_local_shapes(par):
                                                          dtype=par['dtype']), rtol=1e-14)
 
 
+@pytest.mark.mpi(min_size=2)
+@pytest.mark.skipif(backend != "cupy" or not deps.cuda_aware_mpi_enabled,
+                    reason="requires CuPy arrays and CUDA-aware MPI")
+@pytest.mark.parametrize("par", [(par1), (par1j), (par3), (par3j)])
+def test_asarray_stream(par):
+    """Test the ``asarray`` method on a local array filled on another stream"""
+    distributed_array = DistributedArray(global_shape=par['global_shape'],
+                                         partition=par['partition'],
+                                         axis=par['axis'], dtype=par['dtype'],
+                                         engine=backend)
+    # Fill the local array on a non-blocking stream and gather it from the
+    # default stream, which does not wait for the former
+    stream = np.cuda.Stream(non_blocking=True)
+    with stream:
+        distributed_array[:] = np.full(distributed_array.local_shape,
+                                       distributed_array.rank + 1, dtype=par['dtype'])
+    x = np.concatenate([np.full(local_shape, irank + 1, dtype=par['dtype'])
+                        for irank, local_shape in enumerate(distributed_array.local_shapes)],
+                       axis=par['axis'])
+    assert_allclose(distributed_array.asarray(), x, rtol=1e-14)
+
+
 @pytest.mark.mpi(min_size=2)
 @pytest.mark.parametrize("par", [(par4), (par4j), (par5), (par5j),
                                  (par6), (par6b), (par7), (par7b)])
@@ -198,6 +221,27 @@ def test_distributed_math(par1, par2):
                     rtol=1e-14)
 
 
+@pytest.mark.mpi(min_size=2)
+@pytest.mark.parametrize("par1, par2", [(par4, par5), (par4j, par5j),
+                                        (par6b, par7b)])
+def test_distributed_math_out(par1, par2):
+    """Test the Element-Wise Addition and Multiplication with output array"""
+    arr1 = DistributedArray.to_dist(x=par1['x'], partition=par1['partition'], axis=par1['axis'])
+    arr2 = DistributedArray.to_dist(x=par2['x'], partition=par2['partition'], axis=par2['axis'])
+    out = arr1.empty_like()
+    # Addition
+    sum_array = arr1.add(arr2, out=out)
+    assert sum_array is out
+    assert_allclose(out.asarray(), np.add(par1['x'], par2['x']), rtol=1e-14)
+    # Multiplication by a scalar (in-place)
+    mult_array = out.multiply(2., out=out)
+    assert mult_array is out
+    assert_allclose(out.asarray(), 2. * np.add(par1['x'], par2['x']), rtol=1e-14)
+    # Multiplication (in-place)
+    arr1.multiply(arr2, out=arr1)
+    assert_allclose(arr1.asarray(), np.multiply(par1['x'], par2['x']), rtol=1e-14)
+
+
 @pytest.mark.mpi(min_size=2)
 @pytest.mark.parametrize("par1, par2", [(par6, par7), (par6b, par7b),
                                         (par8, par9), (par8b, par9b)])
@@ -119,6 +119,22 @@ def test_stacked_math(par):
     assert_allclose(mult_array.asarray(), np.multiply(stacked_array1.asarray(),
                                                       stacked_array2.asarray()),
                     rtol=1e-14)
+    # Addition and Multiplication with output array
+    out = stacked_array1.empty_like()
+    sum_array = stacked_array1.add(stacked_array2, out=out)
+    assert sum_array is out
+    assert_allclose(out.asarray(), np.add(stacked_array1.asarray(),
+                                          stacked_array2.asarray()),
+                    rtol=1e-14)
+    mult_array = stacked_array1.multiply(stacked_array2, out=out)
+    assert mult_array is out
+    assert_allclose(out.asarray(), np.multiply(stacked_array1.asarray(),
+                                               stacked_array2.asarray()),
+                    rtol=1e-14)
+    out.multiply(2., out=out)
+    assert_allclose(out.asarray(), 2. * np.multiply(stacked_array1.asarray(),
+                                                    stacked_array2.asarray()),
+                    rtol=1e-14)
     # Dot-product
     dot_prod = stacked_array1.dot(stacked_array2)
     assert_allclose(dot_prod, np.dot(stacked_array1.asarray().flatten(),
@@ -195,6 +195,25 @@ def test_local_shapes_nccl(par):
         rtol=1e-14,
     )
 
+
+@pytest.mark.mpi(min_size=2)
+@pytest.mark.parametrize("par", [(par4), (par4j), (par5), (par5j)])
+def test_asarray_stream_nccl(par):
+    """Test the ``asarray`` method on a non-default stream"""
+    x_gpu = cp.asarray(par["x"])
+    dist_array = DistributedArray.to_dist(
+        x=x_gpu,
+        base_comm_nccl=nccl_comm,
+        partition=par["partition"],
+        axis=par["axis"],
+    )
+    comm_stream = cp.cuda.Stream(non_blocking=True)
+    comm_stream.wait_event(cp.cuda.get_current_stream().record())
+    with comm_stream:
+        x_global = dist_array.asarray()
+    comm_stream.synchronize()
+    assert_allclose(x_global.get(), par["x"], rtol=1e-14)
+
 @pytest.mark.mpi(min_size=2)
 @pytest.mark.parametrize("par", [(par4), (par4j), (par5), (par5j),
                                  (par6), (par6b), (par7), (par7b)])
@@ -24,6 +24,18 @@ def test_nccl_enabled():
     run with NCCL and not with the MPI fallack)"""
     assert nccl_enabled
 
+@pytest.mark.mpi(min_size=2)
+def test_initialize_nccl_comm_nogpu(monkeypatch):
+    """Test initialize_nccl_comm raises an error when the local rank
+    exceeds the number of visible GPUs"""
+    device_count = cp.cuda.runtime.getDeviceCount()
+    if device_count == 1:
+        pytest.skip("a single visible GPU is shared by all local ranks")
+    monkeypatch.setenv("OMPI_COMM_WORLD_LOCAL_RANK", str(device_count))
+    with pytest.raises(ValueError, match="has no GPU to use"):
+        initialize_nccl_comm()
+
+
 @pytest.mark.mpi(min_size=2)
 @pytest.mark.parametrize("par", [(par1), ])
 def test_allgather_samesize(par):
@@ -3,18 +3,29 @@ Post Stack Inversion - 3D with CUDA-Aware MPI
 =============================================
 This tutorial is an extension of the :ref:`sphx_glr_tutorials_poststack.py` 
 tutorial where PyLops-MPI is run in multi-GPU setting with GPUs communicating 
-via MPI.
+via MPI. Alternatively, GPUs can communicate via NCCL by setting the environment
+variable ``PYLOPS_GPU_BACKEND=nccl``.
 """
 
+import os
+
+# Optionally bind each rank to a single GPU before MPI initializes CUDA
+# (see below)
+if int(os.environ.get("PYLOPS_BIND_GPU", 0)):
+    os.environ["CUDA_VISIBLE_DEVICES"] = os.environ["OMPI_COMM_WORLD_LOCAL_RANK"]
+
 import numpy as np
 import cupy as cp
-from scipy.signal import filtfilt
+import cupyx
+from cupyx.scipy.ndimage import uniform_filter
 from matplotlib import pyplot as plt
 from mpi4py import MPI
 
 from pylops.utils.wavelets import ricker
-from pylops.basicoperators import Transpose
+from pylops import LinearOperator
+from pylops.basicoperators import FirstDerivative, Transpose
 from pylops.avo.poststack import PoststackLinearModelling
+from pylops.utils.decorators import reshaped
 
 import pylops_mpi
 
@@ -26,36 +37,87 @@ import pylops_mpi
 # start assigning more than one GPU to the available ranks. Note that this 
 # approach will work equally well if we have a multi-node multi-GPU setup, where
 # each node has one or more GPUs.
+#
+# Alternatively, when running with Open MPI and one process per GPU, setting
+# ``PYLOPS_BIND_GPU=1`` makes only the GPU with the same local rank visible to
+# each process (via ``CUDA_VISIBLE_DEVICES``) at the very top of this script,
+# before MPI is initialized. Finally, some MPI implementations require GPU
+# support to be explicitly enabled at runtime (e.g.,
+# ``MPICH_GPU_SUPPORT_ENABLED=1`` for Cray MPICH).
+#
+# When ``PYLOPS_GPU_BACKEND=nccl``, collective communications are instead
+# carried out by NCCL, which is usually much faster than CUDA-aware MPI for the
+# frequent small reductions performed by the solvers when GPUs are connected
+# via NVLink. In this case, GPUs are assigned to the ranks by
+# :py:func:`pylops_mpi.utils._nccl.initialize_nccl_comm`.
 
 plt.close("all")
 rank = MPI.COMM_WORLD.Get_rank()
-device_count = cp.cuda.runtime.getDeviceCount()
-cp.cuda.Device(rank % device_count).use();
+backend = os.environ.get("PYLOPS_GPU_BACKEND", "mpi")
+if backend == "nccl":
+    nccl_comm = pylops_mpi.utils._nccl.initialize_nccl_comm()
+else:
+    nccl_comm = None
+    device_count = cp.cuda.runtime.getDeviceCount()
+    cp.cuda.Device(rank % device_count).use();
 
 ###############################################################################
 # Let's start by defining all the parameters required by the
 # :py:func:`pylops.avo.poststack.PoststackLinearModelling` operator.
-# Note that this section is exactly the same as the one in the MPI example as 
-# we will keep using MPI for transfering metadata (i.e., shapes, dims, etc.)
+# Compared to the MPI example, the 3D model and its smooth version are created
+# directly on the GPU, whilst we keep using MPI for transfering metadata (i.e.,
+# shapes, dims, etc.). Moreover, the forward-backward filtering with a box
+# filter of length :math:`n` performed by :py:func:`scipy.signal.filtfilt`
+# along each axis is equivalent to a triangular filter of length :math:`2n-1`:
+# we therefore smooth the entire model at once by extending it along each axis
+# (as done by :py:func:`scipy.signal.filtfilt`) and applying two box filters
+# with :py:func:`cupyx.scipy.ndimage.uniform_filter`.
 
 # Model
 model = np.load("../testdata/avo/poststack_model.npz")
 x, z, m = model['x'][::3], model['z'], np.log(model['model'])[:, ::3]
 
+# Precision of model, data, and operators (single precision halves the
+# memory traffic of double precision and is accurate enough for the solvers)
+dtype = np.float32
+
 # Making m a 3D model
 ny_i = 20  # size of model in y direction for rank i
 y = np.arange(ny_i)
-m3d_i = np.tile(m[:, :, np.newaxis], (1, 1, ny_i)).transpose((2, 1, 0))
+# (m is simply repeated along y, so we use a broadcasted view instead of
+# materializing the repetitions)
+m3d_i = cp.broadcast_to(cp.asarray(m.T, dtype=dtype), (ny_i, ) + m.T.shape)
 ny_i, nx, nz = m3d_i.shape
 
-# Size of y at all ranks
-ny = MPI.COMM_WORLD.allreduce(ny_i)
+# Size of y at all ranks (using the buffered Allreduce to avoid pickling)
+ny = np.array([ny_i], dtype=np.int32)
+MPI.COMM_WORLD.Allreduce(MPI.IN_PLACE, ny)
+ny = int(ny[0])
 
 # Smooth model
 nsmoothy, nsmoothx, nsmoothz = 5, 30, 20
-mback3d_i = filtfilt(np.ones(nsmoothy) / float(nsmoothy), 1, m3d_i, axis=0)
-mback3d_i = filtfilt(np.ones(nsmoothx) / float(nsmoothx), 1, mback3d_i, axis=1)
-mback3d_i = filtfilt(np.ones(nsmoothz) / float(nsmoothz), 1, mback3d_i, axis=2)
+nsmooth = (nsmoothy, nsmoothx, nsmoothz)
+
+
+def odd_pad(x, npad, axis):
+    # odd extension of x by npad samples at both ends of axis
+    x = cp.moveaxis(x, axis, 0)
+    x = cp.concatenate([2 * x[:1] - x[npad:0:-1], x,
+                        2 * x[-1:] - x[-2:-npad - 2:-1]])
+    return cp.moveaxis(x, 0, axis)
+
+
+mback3d_i = m3d_i
+for axis, nsmooth_axis in enumerate(nsmooth):
+    mback3d_i = odd_pad(mback3d_i, nsmooth_axis - 1, axis)
+mback3d_i = uniform_filter(mback3d_i, size=nsmooth)
+# (for even lengths, the second box filter is shifted by one sample so that
+# the resulting triangular filter is zero-phase)
+mback3d_i = uniform_filter(mback3d_i, size=nsmooth,
+                           origin=tuple(n % 2 - 1 for n in nsmooth))
+mback3d_i = cp.ascontiguousarray(
+    mback3d_i[tuple(slice(n - 1, size - n + 1)
+                    for n, size in zip(nsmooth, mback3d_i.shape))])
 
 # Wavelet
 dt = 0.004
@@ -63,34 +125,93 @@ t0 = np.arange(nz) * dt
 ntwav = 41
 wav = ricker(t0[:ntwav // 2 + 1], 15)[0]
 
-# Collecting all the m3d and mback3d at all ranks
-m3d = np.concatenate(MPI.COMM_WORLD.allgather(m3d_i))
-mback3d = np.concatenate(MPI.COMM_WORLD.allgather(mback3d_i))
+# Collecting all the m3d and mback3d at rank0 (the only one that uses them
+# for verification and plotting). The local arrays are copied to page-locked
+# host buffers, which are also used to receive them at rank0, so that neither
+# the device-to-host copy nor MPI need to pin pageable memory on the fly
+def gather_pinned(x_i):
+    x_i_host = cupyx.empty_pinned(x_i.shape, dtype=x_i.dtype)
+    x_i.get(out=x_i_host)
+    x = cupyx.empty_pinned((ny, ) + x_i.shape[1:], dtype=x_i.dtype) if rank == 0 else None
+    MPI.COMM_WORLD.Gather(x_i_host, x, root=0)
+    return x
+
+
+m3d = gather_pinned(m3d_i)
+mback3d = gather_pinned(mback3d_i)
 
 ###############################################################################
 # We are now ready to initialize various :py:class:`pylops_mpi.DistributedArray` 
 # objects. Compared to the MPI tutorial, we need to make sure that we set ``cupy`` 
-# as the engine and fill the distributed arrays with CuPy arrays.
+# as the engine and fill the distributed arrays with CuPy arrays. We also pass
+# the NCCL communicator (which is ``None`` when using CUDA-aware MPI).
+#
+# Moreover, the local portion of the model is stored with time along the first
+# axis (i.e., ``(nz, ny_i, nx)``), which is the ordering expected by the
+# modelling operator: this way, we avoid transposing the model and the data
+# back and forth every time the operator is applied.
 
 m3d_dist = pylops_mpi.DistributedArray(global_shape=ny * nx * nz, 
+                                       base_comm_nccl=nccl_comm, dtype=dtype,
                                        engine="cupy")
-m3d_dist[:] = cp.asarray(m3d_i.flatten())
+m3d_dist[:] = m3d_i.transpose(2, 0, 1).ravel()
 
 # Do the same thing for smooth model
 mback3d_dist = pylops_mpi.DistributedArray(global_shape=ny * nx * nz, 
+                                           base_comm_nccl=nccl_comm, dtype=dtype,
                                            engine="cupy")
-mback3d_dist[:] = cp.asarray(mback3d_i.flatten())
+mback3d_dist[:] = mback3d_i.transpose(2, 0, 1).ravel()
 
 ###############################################################################
 # For PostStackLinearModelling, there is no change needed to have it run with 
 # MPI. This PyLops operator has GPU-support 
 # (https://pylops.readthedocs.io/en/stable/gpu.html) so it can operate on a 
 # distributed arrays with engine set to CuPy.
-
-PPop = PoststackLinearModelling(cp.asarray(wav.astype(np.float32)), nt0=nz, 
-                                spatdims=(ny_i, nx))
-Top = Transpose((ny_i, nx, nz), (2, 0, 1))
-BDiag = pylops_mpi.basicoperators.MPIBlockDiag(ops=[Top.H @ PPop @ Top, ])
+#
+# However, :py:func:`pylops.avo.poststack.PoststackLinearModelling` convolves
+# the model with the wavelet via FFTs and recomputes the spectrum of the wavelet
+# every time the operator is applied. Since the wavelet is fixed throughout the
+# inversion, we create an equivalent operator (first derivative followed by
+# convolution with the wavelet) where the spectrum of the wavelet is computed
+# only once. :py:func:`pylops.avo.poststack.PoststackLinearModelling` will
+# still be used later on to verify our results.
+
+
+class WaveletConvolve(LinearOperator):
+    def __init__(self, dims, wav, offset, dtype):
+        self.nt = dims[0]
+        self.nfft = int(2 ** np.ceil(np.log2(self.nt + wav.size - 1)))
+        # spectrum of the wavelet, including the time shift due to its offset
+        wavf = cp.fft.rfft(wav, n=self.nfft)
+        shift = cp.exp(2j * np.pi * offset * cp.fft.rfftfreq(self.nfft)).astype(wavf.dtype)
+        self.wavf = (wavf * shift).reshape((-1,) + (1,) * (len(dims) - 1))
+        self.wavf_conj = self.wavf.conj()
+        super().__init__(dtype=np.dtype(dtype), dims=dims, dimsd=dims)
+
+    @reshaped
+    def _matvec(self, x):
+        y = cp.fft.irfft(cp.fft.rfft(x, n=self.nfft, axis=0) * self.wavf,
+                         n=self.nfft, axis=0)
+        return y[:self.nt]
+
+    @reshaped
+    def _rmatvec(self, x):
+        y = cp.fft.irfft(cp.fft.rfft(x, n=self.nfft, axis=0) * self.wavf_conj,
+                         n=self.nfft, axis=0)
+        return y[:self.nt]
+
+
+wav_gpu = cp.asarray(wav.astype(dtype))
+PPop = WaveletConvolve((nz, ny_i, nx), wav_gpu, offset=ntwav // 2, dtype=dtype) * \
+    FirstDerivative((nz, ny_i, nx), axis=0, sampling=1.0, kind="centered", dtype=dtype)
+BDiag = pylops_mpi.basicoperators.MPIBlockDiag(ops=[PPop, ])
+
+
+def asglobal(x_dist):
+    # gather the (nz, ny_i, nx) local portions of all ranks and reorder them
+    # as a (ny, nx, nz) array
+    x = x_dist.asarray().reshape((-1, nz, ny_i, nx))
+    return x.transpose(0, 2, 3, 1).reshape((ny, nx, nz))
 
 ###############################################################################
 # This computation will be done on the GPU(s). The call :code:`asarray()` 
@@ -98,51 +219,88 @@ BDiag = pylops_mpi.basicoperators.MPIBlockDiag(ops=[Top.H @ PPop @ Top, ])
 # Note that the array :code:`d` and :code:`d_0` still live in GPU memory.
 
 d_dist = BDiag @ m3d_dist
-d_local = d_dist.local_array.reshape((ny_i, nx, nz))
-d = d_dist.asarray().reshape((ny, nx, nz))
+d_local = d_dist.local_array.reshape((nz, ny_i, nx))
+d = asglobal(d_dist)
 d_0_dist = BDiag @ mback3d_dist
-d_0 = d_dist.asarray().reshape((ny, nx, nz))
+d_0 = asglobal(d_0_dist)
 
 ###############################################################################
 # Inversion using CGLS solver - no code change is required to run the solver
 # with CUDA-aware MPI (this is handled by the MPI operator and DistributedArray)
 # In this particular case, the local computation will be done in GPU. 
-# Collective communication calls will be carried through MPI GPU-to-GPU.
+# Collective communication calls will be carried through MPI (or NCCL) 
+# GPU-to-GPU. We also time the solver to compare the two communication backends.
 
 # Inversion using CGLS solver
+MPI.COMM_WORLD.Barrier()
+tstart = MPI.Wtime()
 minv3d_iter_dist = pylops_mpi.optimization.basic.cgls(BDiag, d_dist, 
                                                       x0=mback3d_dist,
                                                       niter=100, show=True)[0]
-minv3d_iter = minv3d_iter_dist.asarray().reshape((ny, nx, nz))
+telapsed = MPI.Wtime() - tstart
+if rank == 0:
+    print(f"CGLS with {backend} backend: {telapsed:.3f} s")
+minv3d_iter = asglobal(minv3d_iter_dist)
 
 ###############################################################################
+# We are now going to solve the regularized inversion via normal equations.
+# Instead of creating the normal equations operator by combining operators
+# (i.e., ``BDiag.H @ BDiag + epsR * LapOp.H @ LapOp``), which creates an
+# intermediate distributed array for the scaling and one for the sum at every
+# iteration, we write a small operator that accumulates the regularization
+# term directly into the output of the modelling term with a single
+# element-wise kernel.
+
+axpy = cp.ElementwiseKernel("T x, T a", "T y", "y += a * x", "axpy")
+
+
+class NormalEquations(pylops_mpi.MPILinearOperator):
+    def __init__(self, Op, Reg, epsR):
+        self.args = (Op, Reg, epsR)
+        super().__init__(shape=(Op.shape[1], Op.shape[1]), dtype=Op.dtype)
+
+    def _matvec(self, x):
+        Op, Reg, epsR = self.args
+        y = Op.rmatvec(Op.matvec(x))
+        r = Reg.rmatvec(Reg.matvec(x))
+        axpy(r.local_array, epsR, y.local_array)
+        return y
+
+    def _rmatvec(self, x):
+        return self._matvec(x)
+
 
 # Regularized inversion with normal equations
 epsR = 1e2
+# (the Laplacian acts on the model in (ny, nx, nz) ordering, so each local
+# portion of the model is transposed before applying it)
+TopDiag = pylops_mpi.basicoperators.MPIBlockDiag(ops=[Transpose((nz, ny_i, nx), (1, 2, 0)), ])
 LapOp = pylops_mpi.MPILaplacian(dims=(ny, nx, nz), axes=(0, 1, 2), 
                                 weights=(1, 1, 1),
                                 sampling=(1, 1, 1), 
-                                dtype=BDiag.dtype)
-NormEqOp = BDiag.H @ BDiag + epsR * LapOp.H @ LapOp
+                                dtype=BDiag.dtype) @ TopDiag
+NormEqOp = NormalEquations(BDiag, LapOp, epsR)
 dnorm_dist = BDiag.H @ d_dist
 minv3d_ne_dist = pylops_mpi.optimization.basic.cg(NormEqOp, dnorm_dist, 
                                                   x0=mback3d_dist, 
                                                   niter=100, show=True)[0]
-minv3d_ne = minv3d_ne_dist.asarray().reshape((ny, nx, nz))
+minv3d_ne = asglobal(minv3d_ne_dist)
 
 ###############################################################################
 
 # Regularized inversion with regularized equations
 StackOp = pylops_mpi.MPIStackedVStack([BDiag, np.sqrt(epsR) * LapOp])
-d0_dist = pylops_mpi.DistributedArray(global_shape=ny * nx * nz, engine="cupy")
-d0_dist[:] = 0.
+d0_dist = pylops_mpi.DistributedArray(global_shape=ny * nx * nz,
+                                      base_comm_nccl=nccl_comm, engine="cupy",
+                                      dtype=dtype)
+d0_dist.local_array.fill(0)
 dstack_dist = pylops_mpi.StackedDistributedArray([d_dist, d0_dist])
 
 dnorm_dist = BDiag.H @ d_dist
 minv3d_reg_dist = pylops_mpi.optimization.basic.cgls(StackOp, dstack_dist, 
                                                      x0=mback3d_dist, 
                                                      niter=100, show=True)[0]
-minv3d_reg = minv3d_reg_dist.asarray().reshape((ny, nx, nz))
+minv3d_reg = asglobal(minv3d_reg_dist)
 
 ###############################################################################
 # Finally we visualize the results. Note that the array must be copied back 
@@ -151,13 +309,22 @@ minv3d_reg = minv3d_reg_dist.asarray().reshape((ny, nx, nz))
 if rank == 0:
     # Check the distributed implementation gives the same result
     # as the one running only on rank0
-    PPop0 = PoststackLinearModelling(wav, nt0=nz, spatdims=(ny, nx))
-    d0 = (PPop0 @ m3d.transpose(2, 0, 1)).transpose(1, 2, 0)
+    # (the verification is also performed on the GPU, so that the modelled
+    # data are not copied to the host just to be compared)
+    m3d_gpu = cp.asarray(m3d)
+    PPop0 = PoststackLinearModelling(cp.asarray(wav), nt0=nz, spatdims=(ny, nx))
+    d0 = (PPop0 @ m3d_gpu.transpose(2, 0, 1)).transpose(1, 2, 0)
+    d0_0 = (PPop0 @ cp.asarray(mback3d).transpose(2, 0, 1)).transpose(1, 2, 0)
 
     # Check the two distributed implementations give the same modelling results
-    print('Distr == Local', np.allclose(cp.asnumpy(d), d0, atol=1e-6))
+    print('Distr == Local', bool(cp.allclose(d, d0, atol=1e-6)))
+    print('Smooth Distr == Local', bool(cp.allclose(d_0, d0_0, atol=1e-6)))
     
-    # Visualize
+    # Visualize (each result is copied to the host once and sliced there)
+    d_host = d.get()
+    minv3d_iter_host = minv3d_iter.get()
+    minv3d_ne_host = minv3d_ne.get()
+    minv3d_reg_host = minv3d_reg.get()
     fig, axs = plt.subplots(nrows=6, ncols=3, figsize=(9, 14), constrained_layout=True)
     axs[0][0].imshow(m3d[5, :, :].T, cmap="gist_rainbow", vmin=m.min(), vmax=m.max())
     axs[0][0].set_title("Model x-z")
@@ -179,42 +346,42 @@ if rank == 0:
     axs[1][2].set_title("Smooth Model y-z")
     axs[1][2].axis("tight")
 
-    axs[2][0].imshow(d[5, :, :].T.get(), cmap="gray", vmin=-1, vmax=1)
+    axs[2][0].imshow(d_host[5, :, :].T, cmap="gray", vmin=-1, vmax=1)
     axs[2][0].set_title("Data x-z")
     axs[2][0].axis("tight")
-    axs[2][1].imshow(d[:, 200, :].T.get(), cmap='gray', vmin=-1, vmax=1)
+    axs[2][1].imshow(d_host[:, 200, :].T, cmap='gray', vmin=-1, vmax=1)
     axs[2][1].set_title('Data y-z')
     axs[2][1].axis('tight')
-    axs[2][2].imshow(d[:, :, 220].T.get(), cmap='gray', vmin=-1, vmax=1)
+    axs[2][2].imshow(d_host[:, :, 220].T, cmap='gray', vmin=-1, vmax=1)
     axs[2][2].set_title('Data x-y')
     axs[2][2].axis('tight')
 
-    axs[3][0].imshow(minv3d_iter[5, :, :].T.get(), cmap="gist_rainbow", vmin=m.min(), vmax=m.max())
+    axs[3][0].imshow(minv3d_iter_host[5, :, :].T, cmap="gist_rainbow", vmin=m.min(), vmax=m.max())
     axs[3][0].set_title("Inverted Model iter x-z")
     axs[3][0].axis("tight")
-    axs[3][1].imshow(minv3d_iter[:, 200, :].T.get(), cmap='gist_rainbow', vmin=m.min(), vmax=m.max())
+    axs[3][1].imshow(minv3d_iter_host[:, 200, :].T, cmap='gist_rainbow', vmin=m.min(), vmax=m.max())
     axs[3][1].set_title('Inverted Model iter y-z')
     axs[3][1].axis('tight')
-    axs[3][2].imshow(minv3d_iter[:, :, 220].T.get(), cmap='gist_rainbow', vmin=m.min(), vmax=m.max())
+    axs[3][2].imshow(minv3d_iter_host[:, :, 220].T, cmap='gist_rainbow', vmin=m.min(), vmax=m.max())
     axs[3][2].set_title('Inverted Model iter x-y')
     axs[3][2].axis('tight')
 
-    axs[4][0].imshow(minv3d_ne[5, :, :].T.get(), cmap="gist_rainbow", vmin=m.min(), vmax=m.max())
+    axs[4][0].imshow(minv3d_ne_host[5, :, :].T, cmap="gist_rainbow", vmin=m.min(), vmax=m.max())
     axs[4][0].set_title("Normal Equations Inverted Model iter x-z")
     axs[4][0].axis("tight")
-    axs[4][1].imshow(minv3d_ne[:, 200, :].T.get(), cmap='gist_rainbow', vmin=m.min(), vmax=m.max())
+    axs[4][1].imshow(minv3d_ne_host[:, 200, :].T, cmap='gist_rainbow', vmin=m.min(), vmax=m.max())
     axs[4][1].set_title('Normal Equations Inverted Model iter y-z')
     axs[4][1].axis('tight')
-    axs[4][2].imshow(minv3d_ne[:, :, 220].T.get(), cmap='gist_rainbow', vmin=m.min(), vmax=m.max())
+    axs[4][2].imshow(minv3d_ne_host[:, :, 220].T, cmap='gist_rainbow', vmin=m.min(), vmax=m.max())
     axs[4][2].set_title('Normal Equations Inverted Model iter x-y')
     axs[4][2].axis('tight')
 
-    axs[5][0].imshow(minv3d_reg[5, :, :].T.get(), cmap="gist_rainbow", vmin=m.min(), vmax=m.max())
+    axs[5][0].imshow(minv3d_reg_host[5, :, :].T, cmap="gist_rainbow", vmin=m.min(), vmax=m.max())
     axs[5][0].set_title("Regularized Inverted Model iter x-z")
     axs[5][0].axis("tight")
-    axs[5][1].imshow(minv3d_reg[:, 200, :].T.get(), cmap='gist_rainbow', vmin=m.min(), vmax=m.max())
+    axs[5][1].imshow(minv3d_reg_host[:, 200, :].T, cmap='gist_rainbow', vmin=m.min(), vmax=m.max())
     axs[5][1].set_title('Regularized Inverted Model iter y-z')
     axs[5][1].axis('tight')
-    axs[5][2].imshow(minv3d_reg[:, :, 220].T.get(), cmap='gist_rainbow', vmin=m.min(), vmax=m.max())
+    axs[5][2].imshow(minv3d_reg_host[:, :, 220].T, cmap='gist_rainbow', vmin=m.min(), vmax=m.max())
     axs[5][2].set_title('Regularized Inverted Model iter x-y')
     axs[5][2].axis('tight')